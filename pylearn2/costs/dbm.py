@@ -13,10 +13,9 @@ import collections
 from functools import wraps
 import logging
 import numpy as np
-import operator
 import warnings
 
-from theano.compat.six.moves import reduce, xrange
+from theano.compat.six.moves import xrange
 from theano import config
 from theano.sandbox.rng_mrg import MRG_RandomStreams
 RandomStreams = MRG_RandomStreams
@@ -141,15 +140,12 @@ class BaseCD(Cost):
 
         neg_phase_grads, neg_updates = self._get_negative_phase(model, X, Y)
 
-        updates = OrderedDict()
-        for key, val in pos_updates.items():
-            updates[key] = val
-        for key, val in neg_updates.items():
-            updates[key] = val
+        updates = OrderedDict(pos_updates)
+        updates.update(neg_updates)
 
-        gradients = OrderedDict()
-        for param in list(pos_phase_grads.keys()):
-            gradients[param] = neg_phase_grads[param] + pos_phase_grads[param]
+        gradients = OrderedDict((param, neg_phase_grads[param] + pos_grad)
+                                for param, pos_grad
+                                in pos_phase_grads.items())
 
         return gradients, updates
 
@@ -704,8 +700,8 @@ class VariationalPCD_VarianceReduction(DefaultDataSpecsMixin, Cost):
         neg_phase_grads = OrderedDict(safe_zip(params, T.grad(
             -expected_energy_p, params, consider_constant=constants)))
 
-        for param in list(gradients.keys()):
-            gradients[param] = neg_phase_grads[param] + gradients[param]
+        gradients = OrderedDict((param, neg_phase_grads[param] + pos_grad)
+                                for param, pos_grad in gradients.items())
 
         return gradients, updates
 
@@ -874,7 +870,7 @@ class MF_L1_ActCost(DefaultDataSpecsMixin, Cost):
         if len(layer_costs) == 0:
             return T.as_tensor_variable(0.)
         else:
-            total_cost = reduce(operator.add, layer_costs)
+            total_cost = T.add(*layer_costs)
         total_cost.name = 'MF_L1_ActCost'
 
         assert total_cost.ndim == 0
@@ -1124,7 +1120,7 @@ class WeightDecay(NullDataSpecsMixin, Cost):
             rval.name = '0_weight_decay'
             return rval
         else:
-            total_cost = reduce(operator.add, layer_costs)
+            total_cost = T.add(*layer_costs)
         total_cost.name = 'DBM_WeightDecay'
 
         assert total_cost.ndim == 0
@@ -4,6 +4,7 @@ Autoencoders, denoising autoencoders, and stacked DAEs.
 # Standard library imports
 import functools
 import operator
+import weakref
 
 # Third-party imports
 import numpy
@@ -21,6 +22,111 @@ from pylearn2.space import VectorSpace
 
 theano.config.warn.sum_div_dimshuffle_bug = False
 
+# Activations looked up by name. These are the canonical Theano ops that
+# the graph optimizations (stabilization, elemwise fusion) match against,
+# so they are preferred over any other callable with the same name. Names
+# not listed here are only looked up in theano.tensor.nnet and
+# theano.tensor, never among this module's globals.
+_ACTIVATIONS = {
+    'sigmoid': tensor.nnet.sigmoid,
+    'tanh': tensor.tanh,
+    'softplus': tensor.nnet.softplus,
+    'softmax': tensor.nnet.softmax,
+    'relu': tensor.nnet.relu,
+    'rectifier': tensor.nnet.relu,
+}
+
+# Encoder activations known to be elementwise, which need no graph check
+# in ContractiveAutoencoder. None stands for linear units.
+_KNOWN_ELEMWISE = (
+    tensor.nnet.sigmoid,
+    tensor.tanh,
+    tensor.nnet.softplus,
+    tensor.nnet.relu,
+    None,
+)
+
+
+def _resolve_callable(value, conf_attr):
+    """
+    Turns an activation specification into the function to apply.
+
+    Parameters
+    ----------
+    value : callable, string or None
+        The activation, as given to the constructor.
+    conf_attr : string
+        Name of the constructor argument `value` was passed as, used in
+        error messages.
+
+    Returns
+    -------
+    act : callable or None
+        The activation function, or None for linear units.
+    """
+    if value is None or value == "linear":
+        return None
+    # If it's a callable, use it directly.
+    if hasattr(value, '__call__'):
+        return value
+    elif value in _ACTIVATIONS:
+        return _ACTIVATIONS[value]
+    elif hasattr(tensor.nnet, value):
+        return getattr(tensor.nnet, value)
+    elif hasattr(tensor, value):
+        return getattr(tensor, value)
+    else:
+        raise ValueError("Couldn't interpret %s value: '%s'" %
+                         (conf_attr, value))
+
+
+def _can_concatenate(inputs):
+    """
+    Tells whether a list of minibatches can be stacked along the example
+    axis and processed as a single minibatch.
+
+    Parameters
+    ----------
+    inputs : list of tensor_likes
+        Theano symbolics representing the minibatches.
+
+    Returns
+    -------
+    rval : bool
+        True if there are several minibatches, all of them dense
+        2-tensors of the same dtype.
+    """
+    return (len(inputs) > 1 and
+            all(isinstance(v, tensor.TensorVariable) and v.ndim == 2
+                for v in inputs) and
+            len(set(v.dtype for v in inputs)) == 1)
+
+
+def _split_minibatches(batched, inputs):
+    """
+    Splits the rows of `batched` back into one piece per minibatch of
+    `inputs`, undoing a concatenation along the example axis.
+
+    Parameters
+    ----------
+    batched : tensor_like
+        Theano symbolic computed from the concatenation of `inputs`.
+    inputs : list of tensor_likes
+        The minibatches that were concatenated.
+
+    Returns
+    -------
+    pieces : list of tensor_likes
+        One (symbolic) slice of `batched` per element of `inputs`.
+    """
+    pieces = []
+    start = 0
+    for v in inputs:
+        stop = start + v.shape[0]
+        pieces.append(batched[start:stop])
+        start = stop
+    return pieces
+
 
 class AbstractAutoencoder(Model, Block):
     """
@@ -122,12 +228,14 @@ class Autoencoder(AbstractAutoencoder):
     act_enc : callable or string
         Activation function (elementwise nonlinearity) to use for the
         encoder. Strings (e.g. 'tanh' or 'sigmoid') will be looked up as
-        functions in `theano.tensor.nnet` and `theano.tensor`. Use `None`
+        functions in `theano.tensor.nnet` and `theano.tensor`; 'relu' and
+        'rectifier' both map to `theano.tensor.nnet.relu`. Use `None`
         for linear units.
     act_dec : callable or string
         Activation function (elementwise nonlinearity) to use for the
         decoder. Strings (e.g. 'tanh' or 'sigmoid') will be looked up as
-        functions in `theano.tensor.nnet` and `theano.tensor`. Use `None`
+        functions in `theano.tensor.nnet` and `theano.tensor`; 'relu' and
+        'rectifier' both map to `theano.tensor.nnet.relu`. Use `None`
         for linear units.
     tied_weights : bool, optional
         If `False` (default), a separate set of weights will be allocated
@@ -182,37 +290,18 @@ class Autoencoder(AbstractAutoencoder):
         else:
             self._initialize_w_prime(nvis)
 
-        def _resolve_callable(conf, conf_attr):
-            """
-            .. todo::
-
-                WRITEME
-            """
-            if conf[conf_attr] is None or conf[conf_attr] == "linear":
-                return None
-            # If it's a callable, use it directly.
-            if hasattr(conf[conf_attr], '__call__'):
-                return conf[conf_attr]
-            elif (conf[conf_attr] in globals()
-                  and hasattr(globals()[conf[conf_attr]], '__call__')):
-                return globals()[conf[conf_attr]]
-            elif hasattr(tensor.nnet, conf[conf_attr]):
-                return getattr(tensor.nnet, conf[conf_attr])
-            elif hasattr(tensor, conf[conf_attr]):
-                return getattr(tensor, conf[conf_attr])
-            else:
-                raise ValueError("Couldn't interpret %s value: '%s'" %
-                                 (conf_attr, conf[conf_attr]))
-
-        self.act_enc = _resolve_callable(locals(), 'act_enc')
-        self.act_dec = _resolve_callable(locals(), 'act_dec')
-        self._params = [
-            self.visbias,
-            self.hidbias,
-            self.weights,
-        ]
-        if not self.tied_weights:
-            self._params.append(self.w_prime)
+        self.act_enc = _resolve_callable(act_enc, 'act_enc')
+        self.act_dec = _resolve_callable(act_dec, 'act_dec')
+        # Symbolic reconstructions, keyed by their input variable, and
+        # the broadcastable views of the biases. They are graph fragments
+        # rebuilt on demand, so they are not pickled. A reconstruction
+        # references its input, so the cache holds the reconstructions
+        # weakly: an entry lives as long as its expression is in use.
+        self._reconstruct_cache = weakref.WeakValueDictionary()
+        self._set_bias_rows()
+        self.register_names_to_del(['_reconstruct_cache', '_hidbias_row',
+                                    '_visbias_row'])
+        self._set_params()
 
     def _initialize_weights(self, nvis, rng=None, irange=None, istdev=None):
         """
@@ -248,7 +337,7 @@ class Autoencoder(AbstractAutoencoder):
             WRITEME
         """
         self.hidbias = sharedX(
-            numpy.zeros(self.nhid),
+            numpy.zeros(self.nhid, dtype=theano.config.floatX),
             name='hb',
             borrow=True
         )
@@ -260,11 +349,66 @@ class Autoencoder(AbstractAutoencoder):
             WRITEME
         """
         self.visbias = sharedX(
-            numpy.zeros(nvis),
+            numpy.zeros(nvis, dtype=theano.config.floatX),
             name='vb',
             borrow=True
         )
 
+    def _set_bias_rows(self):
+        """
+        Builds the row (broadcastable along the example axis) views of
+        the biases, once, so that every minibatch expression adds the
+        same bias node.
+        """
+        self._hidbias_row = self.hidbias.dimshuffle('x', 0)
+        if self.visbias is None:
+            self._visbias_row = None
+        else:
+            self._visbias_row = self.visbias.dimshuffle('x', 0)
+
+    def __setstate__(self, d):
+        """
+        Rebuilds the fields that are not pickled.
+        """
+        super(Autoencoder, self).__setstate__(d)
+        self._reconstruct_cache = weakref.WeakValueDictionary()
+        self._set_bias_rows()
+        # Pickles saved before these fields existed do not list them.
+        self.register_names_to_del(['_reconstruct_cache', '_hidbias_row',
+                                    '_visbias_row'])
+        # Patch old pickle files
+        self._params = tuple(self._params)
+        self._param_set = frozenset(self._params)
+
+    def _set_params(self):
+        """
+        Collects the parameters of the model.
+
+        The parameters are stored as a tuple, along with a frozenset of
+        them for constant time membership tests (see `has_param`).
+        """
+        params = [self.visbias, self.hidbias, self.weights]
+        if not self.tied_weights:
+            params.append(self.w_prime)
+        self._params = tuple(params)
+        self._param_set = frozenset(self._params)
+
+    def has_param(self, param):
+        """
+        Tells whether `param` is one of the parameters of this model.
+
+        Parameters
+        ----------
+        param : shared variable
+            The variable to look for.
+
+        Returns
+        -------
+        rval : bool
+            True if `param` is a parameter of this model.
+        """
+        return param in self._param_set
+
     def _initialize_w_prime(self, nvis, rng=None, irange=None, istdev=None):
         """
         .. todo::
@@ -284,7 +428,11 @@ class Autoencoder(AbstractAutoencoder):
 
         if irange is not None:
             assert istdev is None
-            W = (.5 - rng.rand(self.nhid, nvis)) * irange
+            W = rng.uniform(
+                -.5 * irange,
+                .5 * irange,
+                (self.nhid, nvis)
+            )
         else:
             assert istdev is not None
             W = rng.randn(self.nhid, nvis) * istdev
@@ -316,6 +464,7 @@ class Autoencoder(AbstractAutoencoder):
         self._initialize_weights(nvis, rng)
         if not self.tied_weights:
             self._initialize_w_prime(nvis, rng)
+        self._set_bias_rows()
         self._set_params()
 
     def _hidden_activation(self, x):
@@ -332,11 +481,14 @@ class Autoencoder(AbstractAutoencoder):
         y : tensor_like
             (Symbolic) hidden unit activations given the input.
         """
+        # Apply the nonlinearity directly to the affine expression so the
+        # bias add and the activation stay adjacent elemwise nodes that
+        # Theano's fusion optimizer merges into a single loop over the
+        # output of the GEMM. Linear units get no extra identity node.
+        hidden_input = self._hidden_input(x)
         if self.act_enc is None:
-            act_enc = lambda x: x
-        else:
-            act_enc = self.act_enc
-        return act_enc(self._hidden_input(x))
+            return hidden_input
+        return self.act_enc(hidden_input)
 
     def _hidden_input(self, x):
         """
@@ -353,7 +505,43 @@ class Autoencoder(AbstractAutoencoder):
         y : tensor_like
             (Symbolic) input flowing into the hidden layer nonlinearity.
         """
-        return self.hidbias + tensor.dot(x, self.weights)
+        return self._hidbias_row + tensor.dot(x, self.weights)
+
+    def _decoder_input(self, hiddens):
+        """
+        Given a single minibatch of hidden units, computes the input to
+        the decoder nonlinearity without applying it.
+
+        Parameters
+        ----------
+        hiddens : tensor_like
+            Theano symbolic representing the hidden unit minibatch.
+
+        Returns
+        -------
+        y : tensor_like
+            (Symbolic) input flowing into the visible layer nonlinearity.
+        """
+        return self._visbias_row + tensor.dot(hiddens, self.w_prime)
+
+    def _decoder_activation(self, hiddens):
+        """
+        Single minibatch decoder function.
+
+        Parameters
+        ----------
+        hiddens : tensor_like
+            Theano symbolic representing the hidden unit minibatch.
+
+        Returns
+        -------
+        y : tensor_like
+            (Symbolic) visible unit activations given the hiddens.
+        """
+        decoder_input = self._decoder_input(hiddens)
+        if self.act_dec is None:
+            return decoder_input
+        return self.act_dec(decoder_input)
 
     def upward_pass(self, inputs):
         """
@@ -390,8 +578,15 @@ class Autoencoder(AbstractAutoencoder):
         """
         if isinstance(inputs, tensor.Variable):
             return self._hidden_activation(inputs)
+        inputs = list(inputs)
+        if _can_concatenate(inputs):
+            # Encode all the minibatches with a single GEMM, so the
+            # weights are only read once.
+            batched = self._hidden_activation(
+                tensor.concatenate(inputs, axis=0))
+            return _split_minibatches(batched, inputs)
         else:
-            return [self.encode(v) for v in inputs]
+            return [self._hidden_activation(v) for v in inputs]
 
     def decode(self, hiddens):
         """
@@ -411,14 +606,139 @@ class Autoencoder(AbstractAutoencoder):
             Theano symbolic (or list thereof) representing the corresponding
             minibatch(es) after decoding.
         """
-        if self.act_dec is None:
-            act_dec = lambda x: x
-        else:
-            act_dec = self.act_dec
         if isinstance(hiddens, tensor.Variable):
-            return act_dec(self.visbias + tensor.dot(hiddens, self.w_prime))
+            return self._decoder_activation(hiddens)
+        hiddens = list(hiddens)
+        if _can_concatenate(hiddens):
+            batched = self._decoder_activation(
+                tensor.concatenate(hiddens, axis=0))
+            return _split_minibatches(batched, hiddens)
         else:
-            return [self.decode(v) for v in hiddens]
+            return [self._decoder_activation(v) for v in hiddens]
+
+    def reconstruct(self, inputs):
+        """
+        Reconstruct (decode) the inputs after mapping through the encoder.
+
+        Parameters
+        ----------
+        inputs : tensor_like or list of tensor_likes
+            Theano symbolic (or list thereof) representing the input
+            minibatch(es) to be encoded and reconstructed. Assumed to be
+            2-tensors, with the first dimension indexing training examples
+            and the second indexing data dimensions.
+
+        Returns
+        -------
+        reconstructed : tensor_like or list of tensor_like
+            Theano symbolic (or list thereof) representing the corresponding
+            reconstructed minibatch(es) after encoding/decoding.
+
+        Notes
+        -----
+        The reconstruction of a given symbolic variable is built only
+        once: later calls with the same variable (e.g. from a cost and
+        from a monitoring channel) return the same expression, which
+        keeps the graph handed to the optimizer small.
+
+        With a sigmoid decoder, costs such as the binary cross-entropy
+        should rather be computed from `reconstruct_logits`, so that
+        Theano can fuse and stabilize the sigmoid with the cost.
+        """
+        if not isinstance(inputs, tensor.Variable):
+            return self._reconstruct(inputs)
+        rval = self._reconstruct_cache.get(inputs)
+        if rval is None:
+            rval = self._reconstruct(inputs)
+            self._reconstruct_cache[inputs] = rval
+        return rval
+
+    def _reconstruct(self, inputs):
+        """
+        Builds the reconstruction of the inputs without looking it up in,
+        or adding it to, the cache used by `reconstruct`.
+
+        Parameters
+        ----------
+        inputs : tensor_like or list of tensor_likes
+            Theano symbolic (or list thereof) representing the input
+            minibatch(es) to be encoded and reconstructed.
+
+        Returns
+        -------
+        reconstructed : tensor_like or list of tensor_like
+            Theano symbolic (or list thereof) representing the corresponding
+            reconstructed minibatch(es) after encoding/decoding.
+        """
+        if not isinstance(inputs, tensor.Variable):
+            inputs = list(inputs)
+            if _can_concatenate(inputs):
+                # One encoder and one decoder GEMM for all minibatches.
+                # Call the base implementation directly: subclasses such as
+                # DenoisingAutoencoder already preprocessed each minibatch.
+                batched = super(Autoencoder, self).reconstruct(
+                    tensor.concatenate(inputs, axis=0))
+                return _split_minibatches(batched, inputs)
+        return super(Autoencoder, self).reconstruct(inputs)
+
+    def reconstruct_logits(self, inputs):
+        """
+        Reconstruct the inputs after mapping through the encoder, without
+        applying the decoder nonlinearity.
+
+        Parameters
+        ----------
+        inputs : tensor_like or list of tensor_likes
+            Theano symbolic (or list thereof) representing the input
+            minibatch(es) to be encoded and reconstructed. Assumed to be
+            2-tensors, with the first dimension indexing training examples
+            and the second indexing data dimensions.
+
+        Returns
+        -------
+        logits : tensor_like or list of tensor_like
+            Theano symbolic (or list thereof) representing the input to
+            the decoder nonlinearity for the corresponding minibatch(es).
+        """
+        hiddens = self.encode(inputs)
+        if isinstance(hiddens, tensor.Variable):
+            return self._decoder_input(hiddens)
+        return [self._decoder_input(h) for h in hiddens]
+
+    def linear_roundtrip(self, inputs):
+        """
+        Reconstruct the inputs of a linear autoencoder with a single
+        product against :math:`W W'`.
+
+        Parameters
+        ----------
+        inputs : tensor_like or list of tensor_likes
+            Theano symbolic (or list thereof) representing the input
+            minibatch(es) to be reconstructed.
+
+        Returns
+        -------
+        reconstructed : tensor_like or list of tensor_like
+            Theano symbolic (or list thereof), equal to
+            `self.reconstruct(inputs)`.
+
+        Notes
+        -----
+        With linear units, the reconstruction is
+        :math:`x W W' + b_h W' + b_v`, where :math:`W'` is `self.w_prime`.
+        The :math:`(nvis, nvis)` matrix :math:`W W'` is computed once per
+        call of the compiled function and shared by all minibatches, which
+        is cheaper than the two products of `reconstruct` for overcomplete
+        models (`nhid` > `nvis`), e.g. when monitoring on large batches.
+        """
+        if not (self.act_enc is None and self.act_dec is None):
+            raise ValueError("linear_roundtrip requires linear encoder and "
+                             "decoder activations")
+        gram = tensor.dot(self.weights, self.w_prime)
+        bias = self.visbias + tensor.dot(self.hidbias, self.w_prime)
+        if isinstance(inputs, tensor.Variable):
+            return tensor.dot(inputs, gram) + bias
+        return [tensor.dot(v, gram) + bias for v in inputs]
 
     def get_weights(self, borrow=False):
         """
@@ -447,6 +767,12 @@ class DenoisingAutoencoder(Autoencoder):
     corruptor : object
         Instance of a corruptor object to use for corrupting the
         input.
+    fixed_batch_size : int, optional
+        If specified, every minibatch fed to `reconstruct` is declared
+        to have exactly this many examples. The corruption noise then
+        has a static shape, which lets Theano specialize and reuse the
+        compiled sampling kernel. Set it when training with a constant
+        batch size.
 
     Notes
     -----
@@ -455,7 +781,8 @@ class DenoisingAutoencoder(Autoencoder):
     for details.
     """
     def __init__(self, corruptor, nvis, nhid, act_enc, act_dec,
-                 tied_weights=False, irange=1e-3, istdev=None, rng=9001):
+                 tied_weights=False, irange=1e-3, istdev=None, rng=9001,
+                 fixed_batch_size=None):
         super(DenoisingAutoencoder, self).__init__(
             nvis=nvis,
             nhid=nhid,
@@ -467,6 +794,7 @@ class DenoisingAutoencoder(Autoencoder):
             rng=rng
         )
         self.corruptor = corruptor
+        self.fixed_batch_size = fixed_batch_size
 
     def reconstruct(self, inputs):
         """
@@ -487,8 +815,58 @@ class DenoisingAutoencoder(Autoencoder):
             Theano symbolic (or list thereof) representing the corresponding
             reconstructed minibatch(es) after corruption and encoding/decoding.
         """
-        corrupted = self.corruptor(inputs)
-        return super(DenoisingAutoencoder, self).reconstruct(corrupted)
+        corrupted = self.corruptor(self._specify_batch_shape(inputs))
+        # The corrupted variables are new on every call, so caching their
+        # reconstruction could never be hit.
+        return self._reconstruct(corrupted)
+
+    def reconstruct_logits(self, inputs):
+        """
+        Reconstruct the inputs after corrupting and mapping through the
+        encoder, without applying the decoder nonlinearity.
+
+        Parameters
+        ----------
+        inputs : tensor_like or list of tensor_likes
+            Theano symbolic (or list thereof) representing the input
+            minibatch(es) to be corrupted and reconstructed. Assumed to be
+            2-tensors, with the first dimension indexing training examples
+            and the second indexing data dimensions.
+
+        Returns
+        -------
+        logits : tensor_like or list of tensor_like
+            Theano symbolic (or list thereof) representing the input to
+            the decoder nonlinearity for the corresponding corrupted
+            minibatch(es).
+        """
+        corrupted = self.corruptor(self._specify_batch_shape(inputs))
+        return super(DenoisingAutoencoder, self).reconstruct_logits(corrupted)
+
+    def _specify_batch_shape(self, inputs):
+        """
+        Declares the shape of the input minibatch(es) when a fixed batch
+        size was given.
+
+        Parameters
+        ----------
+        inputs : tensor_like or list of tensor_likes
+            Theano symbolic (or list thereof) representing the input
+            minibatch(es).
+
+        Returns
+        -------
+        inputs : tensor_like or list of tensor_likes
+            The same minibatch(es), with their shape specified if
+            `fixed_batch_size` is set.
+        """
+        # Patch old pickle files
+        if getattr(self, 'fixed_batch_size', None) is None:
+            return inputs
+        shape = (self.fixed_batch_size, self.nvis)
+        if isinstance(inputs, tensor.Variable):
+            return tensor.specify_shape(inputs, shape)
+        return [tensor.specify_shape(v, shape) for v in inputs]
 
 
 class ContractiveAutoencoder(Autoencoder):
@@ -500,6 +878,8 @@ class ContractiveAutoencoder(Autoencoder):
     @functools.wraps(Autoencoder.__init__)
     def __init__(self, *args, **kwargs):
         super(ContractiveAutoencoder, self).__init__(*args, **kwargs)
+        if any(self.act_enc is act for act in _KNOWN_ELEMWISE):
+            return
         dummyinput = tensor.matrix()
         if not is_pure_elemwise(self.act_enc(dummyinput), [dummyinput]):
             raise ValueError("Invalid encoder activation function: "
@@ -547,7 +927,10 @@ class ContractiveAutoencoder(Autoencoder):
         # value before applying the nonlinearity/activation function
         acts = self._hidden_input(inputs)
         # Apply the activating nonlinearity.
-        hiddens = self.act_enc(acts)
+        if self.act_enc is None:
+            hiddens = acts
+        else:
+            hiddens = self.act_enc(acts)
         act_grad = tensor.grad(hiddens.sum(), acts)
         return act_grad
 
@@ -663,11 +1046,22 @@ class HigherOrderContractiveAutoencoder(ContractiveAutoencoder):
         corrupted_inputs = [self.corruptor(X) for times in
                             range(self.num_corruptions)]
 
-        hessian = tensor.concatenate(
-            [self.jacobian_h_x(X) - self.jacobian_h_x(corrupted)
-             for corrupted in corrupted_inputs])
+        # The Jacobians only differ through the activation gradients:
+        # J(x) - J(x') = W * (g(x) - g(x'))[:, None, :], so the squared
+        # Frobenius norm of the difference is a dot product with the
+        # squared column norms of W, and the (batch, nvis, nhid)
+        # Jacobian tensors never need to be built.
+        act_grad = self._activation_grad(X)
+        w_sqnorm = tensor.sqr(self.weights).sum(axis=0)
+        sq_norms = [tensor.dot(tensor.sqr(act_grad -
+                                          self._activation_grad(corrupted)),
+                               w_sqnorm).sum()
+                    for corrupted in corrupted_inputs]
 
-        return (hessian ** 2).mean()
+        num_elements = (self.num_corruptions * X.shape[0] *
+                        self.weights.shape[0] * self.weights.shape[1])
+        penalty = reduce(operator.add, sq_norms) / num_elements
+        return tensor.cast(penalty, X.dtype)
 
     def higher_order_penalty_data_specs(self):
         """
@@ -707,7 +1101,10 @@ class UntiedAutoencoder(Autoencoder):
                                      name='hb')
         self.w_prime = theano.shared(base.weights.get_value(borrow=False).T,
                                      name='w_prime')
-        self._params = [self.visbias, self.hidbias, self.weights, self.w_prime]
+        self._set_bias_rows()
+        self._params = (self.visbias, self.hidbias, self.weights,
+                        self.w_prime)
+        self._param_set = frozenset(self._params)
 
 
 class DeepComposedAutoencoder(AbstractAutoencoder):
@@ -803,47 +1200,115 @@ def build_stacked_ae(nvis, nhids, act_enc, act_dec,
                      tied_weights=False, irange=1e-3, rng=None,
                      corruptor=None, contracting=False):
     """
-    .. todo::
-
-        WRITEME properly
-
     Allocate a stack of autoencoders.
+
+    Parameters
+    ----------
+    nvis : int
+        Number of visible units of the bottom layer.
+    nhids : list of ints
+        Number of hidden units of each layer, from bottom to top.
+    act_enc : callable, string, or list thereof
+        Encoder activation, shared by all layers or given per layer.
+        See `Autoencoder`.
+    act_dec : callable, string, or list thereof
+        Decoder activation, shared by all layers or given per layer.
+        See `Autoencoder`.
+    tied_weights : bool or list of bools, optional
+        Whether each layer ties its encoder and decoder weights.
+    irange : float or list of floats, optional
+        Weight initialization range of each layer.
+    rng : RandomState object or seed, optional
+        NumPy random number generator used to initialize all layers.
+    corruptor : object or list of objects, optional
+        If given, the corresponding layers are denoising autoencoders
+        using this corruptor.
+    contracting : bool or list of bools, optional
+        If True, the corresponding layers are contractive autoencoders.
+
+    Returns
+    -------
+    stack : StackedBlocks
+        The stack of autoencoders. Calling it on a symbolic input
+        threads that single variable bottom-up through every layer
+        and returns the list of representations, input first, so each
+        layer's encoder is applied once to the output of the layer
+        below; prefer it to composing the layers' `encode` by hand.
     """
     rng = make_np_rng(rng, which_method='randn')
-    layers = []
-    final = {}
     # "Broadcast" arguments if they are singular, or accept sequences if
     # they are the same length as nhids
-    for c in ['corruptor', 'contracting', 'act_enc', 'act_dec',
-              'tied_weights', 'irange']:
-        if type(locals()[c]) is not str and hasattr(locals()[c], '__len__'):
-            assert len(nhids) == len(locals()[c])
-            final[c] = locals()[c]
+    per_layer = []
+    for value in (act_enc, act_dec, tied_weights, irange, corruptor,
+                  contracting):
+        if type(value) is not str and hasattr(value, '__len__'):
+            assert len(nhids) == len(value)
+            per_layer.append(list(value))
         else:
-            final[c] = [locals()[c]] * len(nhids)
+            per_layer.append([value] * len(nhids))
     # The number of visible units in each layer is the initial input
     # size and the first k-1 hidden unit sizes.
-    nviss = [nvis] + nhids[:-1]
-    seq = izip(nhids, nviss,
-               final['act_enc'],
-               final['act_dec'],
-               final['corruptor'],
-               final['contracting'],
-               final['tied_weights'],
-               final['irange'],)
+    nviss = [nvis] + list(nhids[:-1])
+    layer_args = list(izip(nviss, nhids, *per_layer))
     # Create each layer.
-    for (nhid, nvis, act_enc, act_dec, corr, cae, tied, ir) in seq:
-        args = (nvis, nhid, act_enc, act_dec, tied, ir, rng)
+    layers = []
+    for (nvis, nhid, act_enc, act_dec, tied, ir, corr, cae) in layer_args:
+        args = (nvis, nhid, act_enc, act_dec, tied, ir)
         if cae and corr is not None:
             raise ValueError("Can't specify denoising and contracting "
                              "objectives simultaneously")
         elif cae:
-            autoenc = ContractiveAutoencoder(*args)
+            autoenc = ContractiveAutoencoder(*args, rng=rng)
         elif corr is not None:
-            autoenc = DenoisingAutoencoder(corr, *args)
+            autoenc = DenoisingAutoencoder(corr, *args, rng=rng)
         else:
-            autoenc = Autoencoder(*args)
+            autoenc = Autoencoder(*args, rng=rng)
         layers.append(autoenc)
 
     # Create the stack
     return StackedBlocks(layers)
+
+
+def make_stacked_ae_function(stack, inputs, outputs, updates=None,
+                             fast_compile_threshold=5, **kwargs):
+    """
+    Compile a Theano function from expressions built on a stack of
+    autoencoders, keeping compilation time under control for deep
+    stacks.
+
+    Parameters
+    ----------
+    stack : StackedBlocks
+        The stack the expressions were built from, e.g. as returned by
+        `build_stacked_ae`.
+    inputs : list
+        Inputs of the function, as for `theano.function`.
+    outputs : tensor_like or list of tensor_likes
+        Outputs of the function, as for `theano.function`.
+    updates : dict, optional
+        Updates of the function, as for `theano.function`.
+    fast_compile_threshold : int, optional
+        Minimal number of layers in `stack` from which the
+        `local_greedy_distributor` optimization is excluded.
+    kwargs : dict
+        Any other argument to `theano.function`, including `mode`.
+
+    Returns
+    -------
+    f : theano function
+        The compiled function.
+
+    Notes
+    -----
+    The time `local_greedy_distributor` takes grows very quickly with
+    the size of the graph, so on deep stacks it can dominate the whole
+    compilation. Excluding it makes compilation much faster, at the
+    price of possibly missing a few algebraic simplifications in the
+    compiled function.
+    """
+    mode = kwargs.pop('mode', None)
+    if len(stack) >= fast_compile_threshold:
+        mode = theano.compile.get_mode(mode).excluding(
+            'local_greedy_distributor')
+    return theano.function(inputs, outputs, updates=updates, mode=mode,
+                           **kwargs)
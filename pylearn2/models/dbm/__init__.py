@@ -20,6 +20,9 @@ import logging
 import numpy as np
 import sys
 
+import theano
+from theano.gof.vm import VM_Linker
+
 from pylearn2.compat import OrderedDict
 from pylearn2.expr.nnet import inverse_sigmoid_numpy
 from pylearn2.blocks import Block
@@ -29,21 +32,57 @@ from pylearn2.utils.rng import make_theano_rng
 
 logger = logging.getLogger(__name__)
 
-logger.debug("DBM changing the recursion limit.")
-# We need this to be high enough that the big theano graphs we make
-# when unrolling inference don't cause python to complain.
-# python intentionally declares stack overflow well before the stack
-# segment is actually exceeded. But we can't make this value too big
-# either, or we'll get seg faults when the python interpreter really
-# does go over the stack segment.
-# IG encountered seg faults on eos3 (a machine at LISA labo) when using
-# 50000 so for now it is set to 40000.
-# I think the actual safe recursion limit can't be predicted in advance
-# because you don't know how big of a stack frame each function will
-# make, so there is not really a "correct" way to do this. Really the
-# python interpreter should provide an option to raise the error
-# precisely when you're going to exceed the stack segment.
-sys.setrecursionlimit(40000)
+
+def _raise_recursion_limit():
+    """
+    Raises the recursion limit so that the big theano graphs made when
+    unrolling inference don't make python complain.
+
+    This is called by the DBM right before it builds those graphs rather
+    than at import time, so merely importing this package leaves the
+    interpreter untouched. The limit is never lowered.
+    """
+    # python intentionally declares stack overflow well before the stack
+    # segment is actually exceeded. But we can't make this value too big
+    # either, or we'll get seg faults when the python interpreter really
+    # does go over the stack segment.
+    # IG encountered seg faults on eos3 (a machine at LISA labo) when using
+    # 50000 so for now it is set to 40000.
+    # I think the actual safe recursion limit can't be predicted in advance
+    # because you don't know how big of a stack frame each function will
+    # make, so there is not really a "correct" way to do this. Really the
+    # python interpreter should provide an option to raise the error
+    # precisely when you're going to exceed the stack segment.
+    if sys.getrecursionlimit() < 40000:
+        logger.debug("DBM changing the recursion limit.")
+        sys.setrecursionlimit(40000)
+
+
+def _no_gc_mode(mode=None):
+    """
+    Returns the mode to compile functions that are called many times on
+    arrays of a fixed shape, such as sampling functions.
+
+    Parameters
+    ----------
+    mode : string or theano Mode, optional
+        The mode to compile with. If given, it is returned unchanged.
+
+    Returns
+    -------
+    mode : string or theano Mode
+        `mode` if it was given. Otherwise the default mode, with garbage
+        collection of intermediate results turned off when it runs on the
+        C VM, so that their buffers are reused from one call to the next.
+        Other modes (e.g. DebugMode, NanGuardMode) are left untouched.
+    """
+    if mode is not None:
+        return mode
+    mode = theano.compile.get_default_mode()
+    if (theano.config.cxx and type(mode) is theano.compile.Mode and
+            isinstance(mode.linker, VM_Linker)):
+        mode = mode.clone(link_kwargs={'allow_gc': False})
+    return mode
 
 
 def init_sigmoid_bias_from_marginals(dataset, use_y = False):
@@ -9,15 +9,13 @@ __maintainer__ = "LISA Lab"
 
 import functools
 import logging
-import operator
 import numpy as np
 
-from theano.compat.six.moves import reduce, xrange
-from theano import tensor as T, config
+from theano import function, tensor as T, config
 
 from pylearn2.compat import OrderedDict
 from pylearn2.models import Model
-from pylearn2.models.dbm import flatten
+from pylearn2.models.dbm import flatten, _no_gc_mode, _raise_recursion_limit
 from pylearn2.models.dbm.inference_procedure import WeightDoubling
 from pylearn2.models.dbm.sampling_procedure import GibbsEvenOdd
 from pylearn2.utils import safe_zip, safe_izip
@@ -61,6 +59,7 @@ class DBM(Model):
         super(DBM, self).__init__()
         self.__dict__.update(locals())
         del self.self
+        _raise_recursion_limit()
         assert len(hidden_layers) >= 1
 
         if len(hidden_layers) > 1 and niter <= 1:
@@ -86,6 +85,14 @@ class DBM(Model):
             self.setup_sampling_procedure()
         self.sampling_procedure.set_dbm(self)
 
+    def __setstate__(self, d):
+        """
+        Raises the recursion limit for models loaded from pickle files,
+        which do not go through __init__.
+        """
+        super(DBM, self).__setstate__(d)
+        _raise_recursion_limit()
+
     def get_all_layers(self):
         """
         Get all layers in this model.
@@ -132,18 +139,16 @@ class DBM(Model):
             state_below=self.visible_layer.upward_state(V),
             state=hidden[0], average_below=False, average=False))
 
-        for i in xrange(1, len(self.hidden_layers)):
-            layer = self.hidden_layers[i]
-            samples_below = hidden[i-1]
-            layer_below = self.hidden_layers[i-1]
+        for layer_below, layer, samples_below, samples in safe_izip(
+                self.hidden_layers[:-1], self.hidden_layers[1:],
+                hidden[:-1], hidden[1:]):
             samples_below = layer_below.upward_state(samples_below)
-            samples = hidden[i]
             terms.append(layer.expected_energy_term(state_below=samples_below,
                          state=samples, average_below=False, average=False))
 
         assert len(terms) > 0
 
-        rval = reduce(operator.add, terms)
+        rval = T.add(*terms)
 
         assert rval.ndim == 1
         return rval
@@ -152,6 +157,7 @@ class DBM(Model):
         """
         Perform mean field inference, using the model's inference procedure.
         """
+        _raise_recursion_limit()
         self.setup_inference_procedure()
         return self.inference_procedure.mf(*args, **kwargs)
 
@@ -197,18 +203,16 @@ class DBM(Model):
             state_below=self.visible_layer.upward_state(V),
             average_below=False, state=mf_hidden[0], average=True))
 
-        for i in xrange(1, len(self.hidden_layers)):
-            layer = self.hidden_layers[i]
-            layer_below = self.hidden_layers[i-1]
-            mf_below = mf_hidden[i-1]
+        for layer_below, layer, mf_below, mf in safe_izip(
+                self.hidden_layers[:-1], self.hidden_layers[1:],
+                mf_hidden[:-1], mf_hidden[1:]):
             mf_below = layer_below.upward_state(mf_below)
-            mf = mf_hidden[i]
             terms.append(layer.expected_energy_term(state_below=mf_below,
                          state=mf, average_below=True, average=True))
 
         assert len(terms) > 0
 
-        rval = reduce(operator.add, terms)
+        rval = T.add(*terms)
 
         assert rval.ndim == 1
         return rval
@@ -259,9 +263,9 @@ class DBM(Model):
         hidden_layers = self.hidden_layers
 
         self.hidden_layers[0].set_input_space(visible_layer.space)
-        for i in xrange(1, len(hidden_layers)):
-            hidden_layers[i].set_input_space(
-                hidden_layers[i-1].get_output_space())
+        for layer_below, layer in safe_izip(hidden_layers[:-1],
+                                            hidden_layers[1:]):
+            layer.set_input_space(layer_below.get_output_space())
 
         for layer in self.get_all_layers():
             layer.finalize_initialization()
@@ -309,29 +313,28 @@ class DBM(Model):
             WRITEME
         """
 
-        rval = []
+        # An OrderedDict keeps the parameters in a deterministic order and
+        # deduplicates them in a single pass, without mutating the list
+        # returned by the visible layer
+        params = OrderedDict()
         for param in self.visible_layer.get_params():
             assert param.name is not None
-        rval = self.visible_layer.get_params()
+            params[param] = None
         for layer in self.hidden_layers:
-            for param in layer.get_params():
+            layer_params = layer.get_params()
+            assert not isinstance(layer_params, set)
+            for param in layer_params:
                 if param.name is None:
                     raise ValueError("All of your parameters should have "
                                      "names, but one of " + layer.layer_name +
                                      "'s doesn't")
-            layer_params = layer.get_params()
-            assert not isinstance(layer_params, set)
-            for param in layer_params:
-                if param not in rval:
-                    rval.append(param)
+                params[param] = None
 
         # Patch pickle files that predate the freeze_set feature
         if not hasattr(self, 'freeze_set'):
             self.freeze_set = set([])
 
-        rval = [elem for elem in rval if elem not in self.freeze_set]
-
-        assert all([elem.name is not None for elem in rval])
+        rval = [elem for elem in params if elem not in self.freeze_set]
 
         return rval
 
@@ -551,6 +554,7 @@ class DBM(Model):
         all the odd-indexed layers.
         """
 
+        _raise_recursion_limit()
         updated = self.sampling_procedure.sample(layer_to_state, theano_rng,
                                                  layer_to_clamp, num_steps)
 
@@ -591,6 +595,44 @@ class DBM(Model):
 
         return rval
 
+    def get_sampling_function(self, layer_to_state, theano_rng,
+                              layer_to_clamp=None, num_steps=1, mode=None):
+        """
+        Compiles the sampling updates into a single theano function.
+
+        The whole Gibbs sweep is compiled once, so each call of the returned
+        function runs `num_steps` steps of sampling without rebuilding the
+        graph. Unless `mode` is given, the default mode is used with garbage
+        collection turned off on the C VM, so intermediate buffers are
+        reused from one call to the next. The other parameters are the same
+        as for `get_sampling_updates`.
+
+        Parameters
+        ----------
+        layer_to_state : dict
+            Dictionary mapping layers to shared variables representing
+            batches of samples of them.
+        theano_rng : MRG_RandomStreams
+            Random number generator
+        layer_to_clamp : dict, optional
+            Dictionary mapping layers to bools; see `get_sampling_updates`.
+        num_steps : int, optional
+            Steps of the sampling procedure performed per call.
+        mode : string or theano Mode, optional
+            Mode to compile the function with.
+
+        Returns
+        -------
+        sample_func : theano.compile.Function
+            A function taking no arguments that updates the states in
+            `layer_to_state` in place.
+        """
+        updates = self.get_sampling_updates(layer_to_state, theano_rng,
+                                            layer_to_clamp=layer_to_clamp,
+                                            num_steps=num_steps)
+
+        return function([], updates=updates, mode=_no_gc_mode(mode))
+
     def get_monitoring_channels(self, data):
         """
         .. todo::
@@ -693,5 +735,6 @@ class DBM(Model):
         Does the inference required for multi-prediction training,
         using the model's inference procedure.
         """
+        _raise_recursion_limit()
         self.setup_inference_procedure()
         return self.inference_procedure.do_inpainting(*args, **kwargs)
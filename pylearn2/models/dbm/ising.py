@@ -201,11 +201,11 @@ class IsingVisible(VisibleLayer):
             WRITEME
         """
         driver = numpy_rng.uniform(0., 1., (num_examples, self.nvis))
-        on_prob = sigmoid_numpy(2. * self.beta.get_value() *
-                                self.bias.get_value())
+        on_prob = sigmoid_numpy(2. * self.beta.get_value(borrow=True) *
+                                self.bias.get_value(borrow=True))
         sample = 2. * (driver < on_prob) - 1.
 
-        rval = sharedX(sample, name='v_sample_shared')
+        rval = sharedX(sample, name='v_sample_shared', borrow=True)
 
         return rval
 
@@ -215,8 +215,9 @@ class IsingVisible(VisibleLayer):
 
             WRITEME
         """
-        mean = T.nnet.sigmoid(2. * self.beta * self.b)
-        rval = theano_rng.binomial(size=(num_examples, self.nvis), p=mean)
+        mean = T.nnet.sigmoid(2. * self.beta * self.bias)
+        rval = theano_rng.binomial(size=(num_examples, self.nvis), p=mean,
+                                   dtype=mean.dtype)
         rval = 2. * (rval) - 1.
 
         return rval
@@ -620,11 +621,10 @@ class IsingHidden(HiddenLayer):
 
             WRITEME
         """
-        # work around theano bug with broadcasted vectors
-        z = T.alloc(0., self.dbm.batch_size,
-                    self.dim).astype(self.b.dtype) + \
-            self.b.dimshuffle('x', 0)
-        rval = T.tanh(self.beta * z)
+        # the mean field state only depends on the bias, so take the tanh
+        # of the bias vector once and alloc it to the batch shape
+        rval = T.alloc(T.tanh(self.beta * self.b), self.dbm.batch_size,
+                       self.dim)
         return rval
 
     def make_state(self, num_examples, numpy_rng):
@@ -637,11 +637,11 @@ class IsingHidden(HiddenLayer):
         (not a mean field state) for this variable.
         """
         driver = numpy_rng.uniform(0., 1., (num_examples, self.dim))
-        on_prob = sigmoid_numpy(2. * self.beta.get_value() *
-                                self.b.get_value())
+        on_prob = sigmoid_numpy(2. * self.beta.get_value(borrow=True) *
+                                self.b.get_value(borrow=True))
         sample = 2. * (driver < on_prob) - 1.
 
-        rval = sharedX(sample, name='v_sample_shared')
+        rval = sharedX(sample, name='v_sample_shared', borrow=True)
 
         return rval
 
@@ -652,7 +652,8 @@ class IsingHidden(HiddenLayer):
             WRITEME
         """
         mean = T.nnet.sigmoid(2. * self.beta * self.b)
-        rval = theano_rng.binomial(size=(num_examples, self.nvis), p=mean)
+        rval = theano_rng.binomial(size=(num_examples, self.dim), p=mean,
+                                   dtype=mean.dtype)
         rval = 2. * (rval) - 1.
 
         return rval
@@ -1020,11 +1021,11 @@ class BoltzmannIsingVisible(VisibleLayer):
             WRITEME
         """
         driver = numpy_rng.uniform(0., 1., (num_examples, self.nvis))
-        on_prob = sigmoid_numpy(2. * self.beta.get_value() *
+        on_prob = sigmoid_numpy(2. * self.beta.get_value(borrow=True) *
                                 self.ising_bias_numpy())
         sample = 2. * (driver < on_prob) - 1.
 
-        rval = sharedX(sample, name='v_sample_shared')
+        rval = sharedX(sample, name='v_sample_shared', borrow=True)
 
         return rval
 
@@ -1035,7 +1036,8 @@ class BoltzmannIsingVisible(VisibleLayer):
             WRITEME
         """
         mean = T.nnet.sigmoid(2. * self.beta * self.ising_bias())
-        rval = theano_rng.binomial(size=(num_examples, self.nvis), p=mean)
+        rval = theano_rng.binomial(size=(num_examples, self.nvis), p=mean,
+                                   dtype=mean.dtype)
         rval = 2. * (rval) - 1.
 
         return rval
@@ -1700,11 +1702,10 @@ class BoltzmannIsingHidden(HiddenLayer):
 
             WRITEME
         """
-        # work around theano bug with broadcasted vectors
-        z = T.alloc(0., self.dbm.batch_size,
-                    self.dim).astype(self.boltzmann_b.dtype) + \
-            self.ising_b().dimshuffle('x', 0)
-        rval = T.tanh(self.beta * z)
+        # the mean field state only depends on the bias, so take the tanh
+        # of the bias vector once and alloc it to the batch shape
+        rval = T.alloc(T.tanh(self.beta * self.ising_b()), self.dbm.batch_size,
+                       self.dim)
         return rval
 
     def make_state(self, num_examples, numpy_rng):
@@ -1717,11 +1718,11 @@ class BoltzmannIsingHidden(HiddenLayer):
         (not a mean field state) for this variable.
         """
         driver = numpy_rng.uniform(0., 1., (num_examples, self.dim))
-        on_prob = sigmoid_numpy(2. * self.beta.get_value() *
+        on_prob = sigmoid_numpy(2. * self.beta.get_value(borrow=True) *
                                 self.ising_b_numpy())
         sample = 2. * (driver < on_prob) - 1.
 
-        rval = sharedX(sample, name='v_sample_shared')
+        rval = sharedX(sample, name='v_sample_shared', borrow=True)
 
         return rval
 
@@ -1732,7 +1733,8 @@ class BoltzmannIsingHidden(HiddenLayer):
             WRITEME
         """
         mean = T.nnet.sigmoid(2. * self.beta * self.ising_b())
-        rval = theano_rng.binomial(size=(num_examples, self.dim), p=mean)
+        rval = theano_rng.binomial(size=(num_examples, self.dim), p=mean,
+                                   dtype=mean.dtype)
         rval = 2. * (rval) - 1.
 
         return rval
@@ -17,7 +17,7 @@ from theano.compat.six.moves import input, reduce, xrange
 import time
 import warnings
 
-from theano import tensor as T, function, config
+from theano import tensor as T, function
 import theano
 from theano.gof.op import get_debug_values
 from theano.printing import Print
@@ -475,10 +475,10 @@ class BinaryVector(VisibleLayer):
         if self.copies != 1:
             raise NotImplementedError()
         driver = numpy_rng.uniform(0.,1., (num_examples, self.nvis))
-        mean = sigmoid_numpy(self.bias.get_value())
+        mean = sigmoid_numpy(self.bias.get_value(borrow=True))
         sample = driver < mean
 
-        rval = sharedX(sample, name = 'v_sample_shared')
+        rval = sharedX(sample, name = 'v_sample_shared', borrow = True)
 
         return rval
 
@@ -1272,9 +1272,9 @@ class BinaryVectorMaxPool(HiddenLayer):
 
             WRITEME
         """
-        # work around theano bug with broadcasted vectors
-        z = T.alloc(0., self.dbm.batch_size, self.detector_layer_dim).astype(self.b.dtype) + \
-                self.b.dimshuffle('x', 0)
+        # alloc the bias straight to the batch shape: this works around the
+        # theano bug with broadcasted vectors without a zero buffer and add
+        z = T.alloc(self.b, self.dbm.batch_size, self.detector_layer_dim)
         rval = max_pool_channels(z = z,
                 pool_size = self.pool_size)
         return rval
@@ -1299,8 +1299,8 @@ class BinaryVectorMaxPool(HiddenLayer):
         empty_input = self.h_space.get_origin_batch(num_examples)
         empty_output = self.output_space.get_origin_batch(num_examples)
 
-        h_state = sharedX(empty_input)
-        p_state = sharedX(empty_output)
+        h_state = sharedX(empty_input, borrow = True)
+        p_state = sharedX(empty_output, borrow = True)
 
         theano_rng = make_theano_rng(None, numpy_rng.randint(2 ** 16), which_method="binomial")
 
@@ -1380,10 +1380,10 @@ class BinaryVectorMaxPool(HiddenLayer):
         # Specifically, our terms are -u^T W d - b^T d where u is the upward state of layer below
         # and d is the downward state of this layer
 
-        bias_term = T.dot(downward_state, self.b)
-        weights_term = (self.transformer.lmul(state_below) * downward_state).sum(axis=1)
-
-        rval = -bias_term - weights_term
+        # Both terms are folded into a single elemwise + reduction so no
+        # separate (batch,) bias and weight vectors are materialized
+        z = self.transformer.lmul(state_below) + self.b
+        rval = -(z * downward_state).sum(axis=1)
 
         assert rval.ndim == 1
 
@@ -1834,7 +1834,10 @@ class Softmax(HiddenLayer):
 
             WRITEME
         """
-        rval =  T.nnet.softmax(self.b.dimshuffle('x', 0)) + T.alloc(0., self.dbm.batch_size, self.n_classes).astype(config.floatX)
+        # the softmax only depends on the bias, so compute it for one row
+        # and alloc that row to the batch shape
+        p = T.nnet.softmax(self.b.dimshuffle('x', 0))[0]
+        rval = T.alloc(p, self.dbm.batch_size, self.n_classes)
         return rval
 
     def make_state(self, num_examples, numpy_rng):
@@ -1850,40 +1853,15 @@ class Softmax(HiddenLayer):
         if self.copies != 1:
             raise NotImplementedError("need to make self.copies samples and average them together.")
 
-        t1 = time.time()
-
-        empty_input = self.output_space.get_origin_batch(num_examples)
-        h_state = sharedX(empty_input)
-
-        default_z = T.zeros_like(h_state) + self.b
-
-        theano_rng = make_theano_rng(None, numpy_rng.randint(2 ** 16),
-                                     which_method="binomial")
-
-        h_exp = T.nnet.softmax(default_z)
-
-        h_sample = theano_rng.multinomial(pvals = h_exp, dtype = h_exp.dtype)
-
-        h_state = sharedX( self.output_space.get_origin_batch(
-            num_examples))
-
-
-        t2 = time.time()
+        # The class probabilities only depend on the bias, so compute them
+        # once in numpy and draw every chain with a single multinomial call
+        # instead of compiling a theano function for one update.
+        b = self.b.get_value(borrow=True).astype('float64')
+        pvals = np.exp(b - b.max())
+        pvals /= pvals.sum()
 
-        f = function([], updates = [(
-            h_state , h_sample
-            )])
-
-        t3 = time.time()
-
-        f()
-
-        t4 = time.time()
-
-        logger.info('{0}.make_state took {1}'.format(self, t4-t1))
-        logger.info('\tcompose time: {0}'.format(t2-t1))
-        logger.info('\tcompile time: {0}'.format(t3-t2))
-        logger.info('\texecute time: {0}'.format(t4-t3))
+        sample = numpy_rng.multinomial(1, pvals, size=num_examples)
+        h_state = sharedX(sample, borrow=True)
 
         h_state.name = 'softmax_sample_shared'
 
@@ -1965,10 +1943,8 @@ class Softmax(HiddenLayer):
         # Specifically, our terms are -u^T W d - b^T d where u is the upward state of layer below
         # and d is the downward state of this layer
 
-        bias_term = T.dot(state, self.b)
-        weights_term = (T.dot(state_below, self.W) * state).sum(axis=1)
-
-        rval = -bias_term - weights_term
+        z = T.dot(state_below, self.W) + self.b
+        rval = -(z * state).sum(axis=1)
 
         rval *= self.copies
 
@@ -2413,9 +2389,9 @@ class GaussianVisLayer(VisibleLayer):
 
         sample = numpy_rng.randn(*shape)
 
-        sample *= 1./np.sqrt(self.beta.get_value())
-        sample += self.mu.get_value()
-        rval = sharedX(sample, name = 'v_sample_shared')
+        sample *= 1./np.sqrt(self.beta.get_value(borrow=True))
+        sample += self.mu.get_value(borrow=True)
+        rval = sharedX(sample, name = 'v_sample_shared', borrow = True)
 
         return rval
 
@@ -2938,7 +2914,7 @@ class ConvMaxPool(HiddenLayer):
         t1 = time.time()
 
         empty_input = self.h_space.get_origin_batch(self.dbm.batch_size)
-        h_state = sharedX(empty_input)
+        h_state = sharedX(empty_input, borrow = True)
 
         default_z = T.zeros_like(h_state) + self.broadcasted_bias()
 
@@ -2951,7 +2927,7 @@ class ConvMaxPool(HiddenLayer):
                 theano_rng = theano_rng)
 
         p_state = sharedX( self.output_space.get_origin_batch(
-            self.dbm.batch_size))
+            self.dbm.batch_size), borrow = True)
 
 
         t2 = time.time()
@@ -2993,10 +2969,8 @@ class ConvMaxPool(HiddenLayer):
         # Specifically, our terms are -u^T W d - b^T d where u is the upward state of layer below
         # and d is the downward state of this layer
 
-        bias_term = (downward_state * self.broadcasted_bias()).sum(axis=(1,2,3))
-        weights_term = (self.transformer.lmul(state_below) * downward_state).sum(axis=(1,2,3))
-
-        rval = -bias_term - weights_term
+        z = self.transformer.lmul(state_below) + self.broadcasted_bias()
+        rval = -(z * downward_state).sum(axis=(1,2,3))
 
         assert rval.ndim == 1
 
@@ -3437,7 +3411,7 @@ class ConvC01B_MaxPool(HiddenLayer):
         t1 = time.time()
 
         empty_input = self.h_space.get_origin_batch(self.dbm.batch_size)
-        h_state = sharedX(empty_input)
+        h_state = sharedX(empty_input, borrow = True)
 
         default_z = T.zeros_like(h_state) + self.broadcasted_bias()
 
@@ -3450,7 +3424,7 @@ class ConvC01B_MaxPool(HiddenLayer):
                 theano_rng = theano_rng)
 
         p_state = sharedX( self.output_space.get_origin_batch(
-            self.dbm.batch_size))
+            self.dbm.batch_size), borrow = True)
 
 
         t2 = time.time()
@@ -3646,9 +3620,10 @@ class BVMP_Gaussian(BinaryVectorMaxPool):
 
             WRITEME
         """
-        # work around theano bug with broadcasted vectors
-        z = T.alloc(0., self.dbm.batch_size, self.detector_layer_dim).astype(self.b.dtype) + \
-                self.b.dimshuffle('x', 0) + self.beta_bias()
+        # alloc the bias straight to the batch shape: this works around the
+        # theano bug with broadcasted vectors without a zero buffer and add
+        z = T.alloc(self.b + self.beta_bias(), self.dbm.batch_size,
+                self.detector_layer_dim)
         rval = max_pool_channels(z = z,
                 pool_size = self.pool_size)
         return rval
@@ -3674,8 +3649,8 @@ class BVMP_Gaussian(BinaryVectorMaxPool):
         empty_input = self.h_space.get_origin_batch(num_examples)
         empty_output = self.output_space.get_origin_batch(num_examples)
 
-        h_state = sharedX(empty_input)
-        p_state = sharedX(empty_output)
+        h_state = sharedX(empty_input, borrow = True)
+        p_state = sharedX(empty_output, borrow = True)
 
         theano_rng = make_theano_rng(None, numpy_rng.randint(2 ** 16),
                                      which_method="binomial")
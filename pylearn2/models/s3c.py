@@ -1759,21 +1759,18 @@ class E_Step(object):
                        monitor_s_mag = False,
                        rho = 0.5,
                        monitor_ranges = False):
-        self.autonomous = True
+        self.autonomous = h_new_coeff_schedule is not None
 
-        if h_new_coeff_schedule is None:
-            self.autonomous = False
+        if not self.autonomous:
             assert s_new_coeff_schedule is None
             assert rho is None
             assert clip_reflections is None
             assert monitor_energy_functional is None
-        else:
-            if s_new_coeff_schedule is None:
-                s_new_coeff_schedule = [ 1.0 for cur_rho in h_new_coeff_schedule ]
-            else:
-                if len(s_new_coeff_schedule) != len(h_new_coeff_schedule):
-                    raise ValueError('s_new_coeff_schedule has %d elems ' % (len(s_new_coeff_schedule),) + \
-                            'but h_new_coeff_schedule has %d elems' % (len(h_new_coeff_schedule),) )
+        elif s_new_coeff_schedule is None:
+            s_new_coeff_schedule = [ 1.0 for cur_rho in h_new_coeff_schedule ]
+        elif len(s_new_coeff_schedule) != len(h_new_coeff_schedule):
+            raise ValueError('s_new_coeff_schedule has %d elems ' % (len(s_new_coeff_schedule),) + \
+                    'but h_new_coeff_schedule has %d elems' % (len(h_new_coeff_schedule),) )
 
 
         if s_new_coeff_schedule is not None:
@@ -2231,11 +2228,9 @@ class Grad_M_Step:
     def __init__(self, learning_rate = None, B_learning_rate_scale  = 1,
             alpha_learning_rate_scale = 1.,
             W_learning_rate_scale = 1, p_penalty = 0.0, B_penalty = 0.0, alpha_penalty = 0.0):
-        self.autonomous = True
+        self.autonomous = learning_rate is not None
 
-        if learning_rate is None:
-            self.autonomous = False
-        else:
+        if self.autonomous:
             self.learning_rate = np.cast[config.floatX](float(learning_rate))
 
 
@@ -8,8 +8,9 @@ import theano
 import theano.tensor as tensor
 from theano import config
 from pylearn2.models.autoencoder import Autoencoder, \
-    HigherOrderContractiveAutoencoder, DeepComposedAutoencoder, \
-    UntiedAutoencoder, StackedDenoisingAutoencoder
+    DenoisingAutoencoder, HigherOrderContractiveAutoencoder, DeepComposedAutoencoder, \
+    UntiedAutoencoder, StackedDenoisingAutoencoder, build_stacked_ae, \
+    make_stacked_ae_function
 from pylearn2.corruption import BinomialCorruptor
 from pylearn2.config import yaml_parse
 from theano.tensor.basic import _allclose
@@ -40,6 +41,40 @@ def test_autoencoder_logistic_linear_tied():
     assert _allclose(ff(data), result)
 
 
+def test_autoencoder_reconstruct_logits():
+    data = np.random.randn(10, 5).astype(config.floatX)
+    ae = Autoencoder(5, 7, act_enc='tanh', act_dec='sigmoid',
+                     tied_weights=True)
+    d = tensor.matrix()
+    logits = ae.reconstruct_logits(d)
+    ff = theano.function([d], [tensor.nnet.sigmoid(logits),
+                               ae.reconstruct(d)])
+    from_logits, reconstructed = ff(data)
+    assert _allclose(from_logits, reconstructed)
+
+
+def test_autoencoder_linear_roundtrip():
+    data = np.random.randn(10, 5).astype(config.floatX)
+    ae = Autoencoder(5, 7, act_enc=None, act_dec=None, tied_weights=True)
+    ae.hidbias.set_value(np.random.randn(7).astype(config.floatX))
+    ae.visbias.set_value(np.random.randn(5).astype(config.floatX))
+    d = tensor.matrix()
+    ff = theano.function([d], [ae.linear_roundtrip(d), ae.reconstruct(d)])
+    roundtrip, reconstructed = ff(data)
+    assert _allclose(roundtrip, reconstructed)
+
+
+def test_autoencoder_linear_roundtrip_untied():
+    data = np.random.randn(10, 5).astype(config.floatX)
+    ae = Autoencoder(5, 7, act_enc=None, act_dec=None, tied_weights=False)
+    ae.hidbias.set_value(np.random.randn(7).astype(config.floatX))
+    ae.visbias.set_value(np.random.randn(5).astype(config.floatX))
+    d = tensor.matrix()
+    ff = theano.function([d], [ae.linear_roundtrip(d), ae.reconstruct(d)])
+    roundtrip, reconstructed = ff(data)
+    assert _allclose(roundtrip, reconstructed)
+
+
 def test_autoencoder_tanh_cos_untied():
     data = np.random.randn(10, 5).astype(config.floatX)
     ae = Autoencoder(5, 7, act_enc='tanh', act_dec='cos',
@@ -56,6 +91,148 @@ def test_autoencoder_tanh_cos_untied():
     assert _allclose(ff(data), result)
 
 
+def test_autoencoder_relu_untied():
+    data = np.random.randn(10, 5).astype(config.floatX)
+    ae = Autoencoder(5, 7, act_enc='rectifier', act_dec='linear',
+                     tied_weights=False)
+    assert ae.act_enc is tensor.nnet.relu
+    w = ae.weights.get_value()
+    w_prime = ae.w_prime.get_value()
+    ae.hidbias.set_value(np.random.randn(7).astype(config.floatX))
+    hb = ae.hidbias.get_value()
+    ae.visbias.set_value(np.random.randn(5).astype(config.floatX))
+    vb = ae.visbias.get_value()
+    d = tensor.matrix()
+    result = np.dot(np.maximum(0, hb + np.dot(data, w)), w_prime) + vb
+    ff = theano.function([d], ae.reconstruct(d))
+    assert _allclose(ff(data), result)
+
+
+def test_autoencoder_reconstruct_memoized():
+    """
+    Tests that the reconstruction of a variable is built only once, and
+    that denoising autoencoders do not cache their corrupted inputs.
+    """
+    ae = Autoencoder(5, 7, act_enc='tanh', act_dec='sigmoid')
+    d = tensor.matrix()
+    assert ae.reconstruct(d) is ae.reconstruct(d)
+    dae = DenoisingAutoencoder(BinomialCorruptor(corruption_level=0.5),
+                               5, 7, act_enc='tanh', act_dec='sigmoid')
+    reconstructed = dae.reconstruct(d)
+    assert len(dae._reconstruct_cache) == 0
+    assert reconstructed is not dae.reconstruct(d)
+
+
+def test_autoencoder_old_pickle_resave():
+    """
+    Tests that the graph fragments rebuilt when loading an old pickle
+    are not saved again.
+    """
+    ae = Autoencoder(5, 7, act_enc='tanh', act_dec='sigmoid')
+    state = ae.__getstate__()
+    state['names_to_del'] = set()
+    loaded = Autoencoder.__new__(Autoencoder)
+    loaded.__setstate__(state)
+    assert '_reconstruct_cache' not in loaded.__getstate__()
+    assert '_hidbias_row' not in loaded.__getstate__()
+
+
+def test_autoencoder_list_inputs():
+    """
+    Tests that encoding and reconstructing a list of minibatches gives
+    the same result as processing each minibatch on its own.
+    """
+    data = [np.random.randn(n, 5).astype(config.floatX) for n in (3, 4)]
+    ae = Autoencoder(5, 7, act_enc='tanh', act_dec='sigmoid',
+                     tied_weights=False)
+    ae.hidbias.set_value(np.random.randn(7).astype(config.floatX))
+    ae.visbias.set_value(np.random.randn(5).astype(config.floatX))
+    d = [tensor.matrix(), tensor.matrix()]
+    encode = theano.function(d, ae.encode(d))
+    reconstruct = theano.function(d, ae.reconstruct(d))
+    encode_one = theano.function([d[0]], ae.encode(d[0]))
+    reconstruct_one = theano.function([d[0]], ae.reconstruct(d[0]))
+    for batch, h, r in zip(data, encode(*data), reconstruct(*data)):
+        assert h.shape == (batch.shape[0], 7)
+        assert _allclose(h, encode_one(batch))
+        assert _allclose(r, reconstruct_one(batch))
+
+
+class CountingCorruptor(BinomialCorruptor):
+    """
+    A binomial corruptor that counts how many minibatches it corrupted.
+    """
+    def __init__(self, *args, **kwargs):
+        super(CountingCorruptor, self).__init__(*args, **kwargs)
+        self.calls = 0
+
+    def _corrupt(self, x):
+        self.calls += 1
+        return super(CountingCorruptor, self)._corrupt(x)
+
+
+def check_dae_list_inputs(fixed_batch_size):
+    data = [np.random.randn(3, 5).astype(config.floatX) for i in range(2)]
+    corruptor = CountingCorruptor(corruption_level=0.)
+    dae = DenoisingAutoencoder(corruptor, 5, 7, act_enc='tanh',
+                               act_dec='sigmoid',
+                               fixed_batch_size=fixed_batch_size)
+    ae = Autoencoder(5, 7, act_enc='tanh', act_dec='sigmoid')
+    ae.weights.set_value(dae.weights.get_value())
+    ae.w_prime.set_value(dae.w_prime.get_value())
+    d = [tensor.matrix(), tensor.matrix()]
+    reconstructed = dae.reconstruct(d)
+    assert corruptor.calls == len(d)
+    reconstruct = theano.function(d, reconstructed)
+    reconstruct_one = theano.function([d[0]], ae.reconstruct(d[0]))
+    for batch, r in zip(data, reconstruct(*data)):
+        assert _allclose(r, reconstruct_one(batch))
+
+
+def test_dae_list_inputs():
+    """
+    Tests that a denoising autoencoder corrupts each minibatch of a list
+    exactly once, with and without a fixed batch size.
+    """
+    check_dae_list_inputs(None)
+    check_dae_list_inputs(3)
+
+
+def test_dae_fixed_batch_size():
+    """
+    Tests that a fixed batch size is enforced on the minibatches given
+    to a denoising autoencoder.
+    """
+    corruptor = BinomialCorruptor(corruption_level=0.5)
+    dae = DenoisingAutoencoder(corruptor, 5, 7, act_enc='tanh',
+                               act_dec='sigmoid', fixed_batch_size=3)
+    d = tensor.matrix()
+    reconstruct = theano.function([d], dae.reconstruct(d))
+    data = np.random.randn(3, 5).astype(config.floatX)
+    assert reconstruct(data).shape == (3, 5)
+    data = np.random.randn(4, 5).astype(config.floatX)
+    np.testing.assert_raises(AssertionError, reconstruct, data)
+
+
+def test_make_stacked_ae_function():
+    """
+    Tests that functions compiled for deep stacks exclude
+    local_greedy_distributor and still compute the stack's output.
+    """
+    data = np.random.randn(10, 5).astype(config.floatX)
+    stack = build_stacked_ae(5, [4] * 5, 'tanh', 'sigmoid')
+    x = tensor.matrix()
+    output = stack(x)[-1]
+    fast = make_stacked_ae_function(stack, [x], output)
+    full = make_stacked_ae_function(stack, [x], output,
+                                    fast_compile_threshold=6)
+    assert 'local_greedy_distributor' in \
+        fast.maker.mode.provided_optimizer.exclude
+    assert 'local_greedy_distributor' not in \
+        getattr(full.maker.mode.provided_optimizer, 'exclude', ())
+    assert _allclose(fast(data), full(data))
+
+
 def test_high_order_autoencoder_init():
     """
     Just test that model initialize and return
@@ -76,6 +253,32 @@ def test_high_order_autoencoder_init():
     assert type(ff(data)) == np.ndarray
 
 
+def test_high_order_autoencoder_penalty():
+    """
+    Tests that the higher order penalty is the mean squared difference
+    between the Jacobians at the input and at its corruptions.
+    """
+    X = tensor.matrix()
+    data = np.random.randn(10, 5).astype(config.floatX)
+    for act_enc in ('sigmoid', 'tanh', 'softplus', None):
+        model = HigherOrderContractiveAutoencoder(
+            corruptor=lambda v: .5 * v + .3,
+            num_corruptions=2,
+            nvis=5,
+            nhid=7,
+            act_enc=act_enc,
+            act_dec='sigmoid',
+            irange=.5)
+        model.hidbias.set_value(np.random.randn(7).astype(config.floatX))
+        jacobian = model.jacobian_h_x(X)
+        corrupted = [model.corruptor(X)] * model.num_corruptions
+        expected = (tensor.concatenate([jacobian - model.jacobian_h_x(c)
+                                        for c in corrupted]) ** 2).mean()
+        ff = theano.function([X], [model.higher_order_penalty(X), expected])
+        penalty, expected_penalty = ff(data)
+        assert _allclose(penalty, expected_penalty)
+
+
 def test_cae_basic():
     """
     Tests that we can load a contractive autoencoder
@@ -108,6 +311,9 @@ def test_untied_ae():
                      tied_weights=True)
     model = UntiedAutoencoder(ae)
     model._ensure_extensions()
+    assert model.has_param(model.w_prime)
+    assert not model.has_param(ae.weights)
+    assert len(model.get_params()) == 4
 
 
 def test_dcae():
@@ -144,3 +350,25 @@ def test_sdae():
     result = np.cos(np.dot(np.tanh(hb + np.dot(data,  w)), w_prime) + vb)
     ff = theano.function([d], model.reconstruct(d))
     assert not _allclose(ff(data), result)
+
+
+def test_build_stacked_ae():
+    """
+    Tests that build_stacked_ae broadcasts its arguments and chains the
+    layer sizes.
+    """
+    corruptor = BinomialCorruptor(corruption_level=0.5)
+    stack = build_stacked_ae(5, [7, 3], act_enc='sigmoid',
+                             act_dec=['sigmoid', None],
+                             corruptor=[None, corruptor], rng=1)
+    layers = stack.layers()
+    assert len(layers) == 2
+    assert layers[0].get_weights().shape == (5, 7)
+    assert layers[1].get_weights().shape == (7, 3)
+    assert layers[1].act_dec is None
+    assert layers[1].corruptor is corruptor
+
+    data = np.random.randn(10, 5).astype(config.floatX)
+    d = tensor.matrix()
+    ff = theano.function([d], stack(d)[-1])
+    assert ff(data).shape == (10, 3)
@@ -2,6 +2,7 @@ from __future__ import print_function
 
 from pylearn2.models.dbm.dbm import DBM
 from pylearn2.models.dbm.layer import BinaryVector, BinaryVectorMaxPool, Softmax, GaussianVisLayer
+from pylearn2.models.dbm.ising import IsingVisible, IsingHidden
 
 __authors__ = "Ian Goodfellow"
 __copyright__ = "Copyright 2012, Universite de Montreal"
@@ -11,8 +12,10 @@ __maintainer__ = "LISA Lab"
 
 import numpy as np
 import random
+import sys
 assert hasattr(np, 'exp')
 
+import theano
 from theano.compat.six.moves import xrange
 from theano import config
 from theano import function
@@ -24,6 +27,7 @@ from pylearn2.expr.nnet import inverse_sigmoid_numpy
 from pylearn2.costs.dbm import VariationalCD
 import pylearn2.testing.datasets as datasets
 from pylearn2.space import VectorSpace
+from pylearn2.utils import serial
 from pylearn2.utils import sharedX
 from pylearn2.utils import safe_zip
 from pylearn2.utils.data_specs import DataSpecsMapping
@@ -898,6 +902,30 @@ def test_softmax_make_state():
 
     check_multinomial_samples(value, (num_samples, n), mean, tol)
 
+def test_softmax_make_state_one_hot():
+
+    # Verifies that Softmax.make_state draws one-hot floatX rows, even
+    # when the biases are too large to exponentiate directly
+
+    n = 4
+    num_samples = 50
+
+    layer = Softmax(n_classes = n, layer_name = 'y')
+    layer.set_biases(np.asarray([1000., 0., -1000., 1000.],
+                                dtype=config.floatX))
+
+    rng = np.random.RandomState([2012, 11, 1, 11])
+
+    state = layer.make_state(num_examples=num_samples, numpy_rng=rng)
+
+    value = state.get_value()
+
+    assert value.shape == (num_samples, n)
+    assert value.dtype == config.floatX
+    assert is_binary(value)
+    assert np.all(value.sum(axis=1) == 1)
+    assert np.all(value[:, 1:3] == 0)
+
 def test_softmax_mf_energy_consistent():
 
     # A test of the Softmax class
@@ -1164,6 +1192,134 @@ def test_make_symbolic_state():
         assert s.shape == r
 
 
+
+def test_ising_make_symbolic_state_dtype():
+    # Tests that the Ising layers draw their symbolic states in floatX,
+    # with values in {-1, 1}
+    num_examples = 10
+    theano_rng = MRG_RandomStreams(2012+11+1)
+
+    old_floatX = config.floatX
+    try:
+        config.floatX = 'float32'
+        beta = sharedX(1.)
+        visible_layer = IsingVisible(nvis=5, beta=beta)
+        hidden_layer = IsingHidden(dim=4, layer_name='h', beta=beta)
+        states = [visible_layer.make_symbolic_state(num_examples,
+                                                    theano_rng),
+                  hidden_layer.make_symbolic_state(num_examples,
+                                                   theano_rng)]
+        assert all(s.dtype == 'float32' for s in states)
+        f = function(inputs=[], outputs=states)
+    finally:
+        config.floatX = old_floatX
+
+    for s, r in zip(f(), [(num_examples, 5), (num_examples, 4)]):
+        assert s.shape == r
+        assert s.dtype == 'float32'
+        assert np.all(np.abs(s) == 1)
+
+def test_get_sampling_function():
+    # Tests that the compiled sampling function updates the chains in
+    # place and keeps them binary
+    visible_layer = BinaryVector(nvis=20)
+    hidden_layer = BinaryVectorMaxPool(detector_layer_dim=10,
+                                       pool_size=1,
+                                       layer_name='h',
+                                       irange=0.05,
+                                       init_bias=-2.0)
+    model = DBM(visible_layer=visible_layer,
+                hidden_layers=[hidden_layer],
+                batch_size=5,
+                niter=1)
+
+    layer_to_state = model.make_layer_to_state(5)
+    v_state = layer_to_state[visible_layer]
+    sample_func = model.get_sampling_function(layer_to_state,
+                                              MRG_RandomStreams(2015))
+    sample_func()
+
+    v = v_state.get_value()
+    assert v.shape == (5, 20)
+    assert is_binary(v)
+
+    # An explicit mode is used as is
+    mode = theano.compile.get_mode('FAST_COMPILE')
+    sample_func = model.get_sampling_function(layer_to_state,
+                                              MRG_RandomStreams(2015),
+                                              mode=mode)
+    assert sample_func.maker.mode is mode
+    sample_func()
+
+
+def test_sampling_function_resized_chains():
+    # Tests that a compiled sampling function keeps working after the
+    # chains are resized
+    visible_layer = BinaryVector(nvis=20)
+    softmax_layer = Softmax(n_classes=10, layer_name='s', irange=0.05)
+    model = DBM(visible_layer=visible_layer,
+                hidden_layers=[softmax_layer],
+                batch_size=5,
+                niter=1)
+
+    layer_to_state = model.make_layer_to_state(5)
+    sample_func = model.get_sampling_function(layer_to_state,
+                                              MRG_RandomStreams(2015))
+    sample_func()
+
+    rng = np.random.RandomState([2012, 11, 1, 11])
+    resized = model.make_layer_to_state(8, rng)
+    for layer, state in resized.items():
+        layer_to_state[layer].set_value(state.get_value())
+    sample_func()
+
+    v = layer_to_state[visible_layer].get_value()
+    assert v.shape == (8, 20)
+    assert is_binary(v)
+
+def test_dbm_unpickle_recursion_limit():
+    # Tests that loading a DBM from a pickle file raises the recursion
+    # limit needed to build its graphs
+    visible_layer = BinaryVector(nvis=20)
+    softmax_layer = Softmax(n_classes=10, layer_name='s', irange=0.05)
+    model = DBM(visible_layer=visible_layer,
+                hidden_layers=[softmax_layer],
+                batch_size=5,
+                niter=1)
+    pickled = serial.to_string(model)
+
+    old_limit = sys.getrecursionlimit()
+    try:
+        sys.setrecursionlimit(2000)
+        serial.from_string(pickled)
+        assert sys.getrecursionlimit() >= 40000
+    finally:
+        sys.setrecursionlimit(old_limit)
+
+def test_dbm_get_params():
+    # Tests that the parameters come back once each, visible layer first,
+    # and that frozen parameters are left out
+    visible_layer = BinaryVector(nvis=20)
+    hidden_layer = BinaryVectorMaxPool(detector_layer_dim=10,
+                                       pool_size=1,
+                                       layer_name='h',
+                                       irange=0.05,
+                                       init_bias=-2.0)
+    model = DBM(visible_layer=visible_layer,
+                hidden_layers=[hidden_layer],
+                batch_size=5,
+                niter=1)
+
+    params = model.get_params()
+    expected = visible_layer.get_params() + hidden_layer.get_params()
+    assert len(params) == len(expected)
+    assert all(p is e for p, e in safe_zip(params, expected))
+
+    model.freeze([visible_layer.bias])
+    assert visible_layer.bias not in model.get_params()
+    assert len(model.get_params()) == len(expected) - 1
+
+
 def test_variational_cd():
 
     # Verifies that VariationalCD works well with make_layer_to_symbolic_state
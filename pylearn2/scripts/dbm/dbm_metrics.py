@@ -43,6 +43,7 @@ from theano import scan
 import pylearn2
 from pylearn2.compat import OrderedDict
 from pylearn2.datasets.mnist import MNIST
+from pylearn2.models.dbm import _no_gc_mode
 from pylearn2.utils import serial
 from pylearn2 import utils
 
@@ -218,7 +219,9 @@ def compute_log_ais_weights(batch_size, free_energy_fn, sample_fn, betas):
         Function which, given temperature beta_k, generates samples h1 ~
         p_k(h1).
     betas : array-like object of scalars
-        Inverse temperature parameters for which to compute the log_ais weights
+        Inverse temperature parameters for which to compute the log_ais
+        weights. Each one is passed to `free_energy_fn` and `sample_fn` as
+        a 0-d floatX array, so both may be compiled with `trust_input`.
 
     Returns
     -------
@@ -230,7 +233,8 @@ def compute_log_ais_weights(batch_size, free_energy_fn, sample_fn, betas):
 
     # Iterate from inverse  temperature beta_k=0 to beta_k=1...
     for i in range(len(betas) - 1):
-        bp, bp1 = betas[i], betas[i+1]
+        bp = numpy.asarray(betas[i], dtype=floatX)
+        bp1 = numpy.asarray(betas[i+1], dtype=floatX)
         log_ais_w += free_energy_fn(bp) - free_energy_fn(bp1)
         sample_fn(bp1)
         if i % 1e3 == 0:
@@ -611,13 +615,22 @@ def estimate_likelihood(W_list, b_list, trainset, testset, free_energy_fn=None,
                                 theano_rng=theano_rng)
     for (nsample, new_nsample) in zip(nsamples, new_nsamples):
         updates[nsample] = new_nsample
+    # Both functions are called once per temperature in the AIS loop on
+    # fixed-shape samples, so reuse their intermediate buffers between
+    # calls.
+    ais_mode = _no_gc_mode()
     sample_fn = theano.function([beta], [], updates=updates,
-                                name='sample_func')
+                                name='sample_func', mode=ais_mode)
 
     # Build function to compute free-energy of p_k(h1).
     fe_bp_h1 = free_energy_at_beta(W_list, b_list, nsamples, beta,
                                    pa_bias, marginalize_odd=marginalize_odd)
-    free_energy_fn = theano.function([beta], fe_bp_h1)
+    free_energy_fn = theano.function([beta], fe_bp_h1, mode=ais_mode)
+
+    # The AIS loop already hands them floatX arrays, so also skip theano's
+    # input validation.
+    sample_fn.trust_input = True
+    free_energy_fn.trust_input = True
 
     ###########
     ## RUN AIS
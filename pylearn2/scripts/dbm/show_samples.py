@@ -22,7 +22,6 @@ from pylearn2.config import yaml_parse
 from pylearn2.expr.basic import is_binary
 from pylearn2.gui.patch_viewer import PatchViewer
 from pylearn2.utils import serial
-from theano import function
 from theano.sandbox.rng_mrg import MRG_RandomStreams
 from theano.compat.six.moves import input, xrange
 
@@ -151,25 +150,19 @@ def get_sample_func(model, layer_to_state, x):
     theano_rng = MRG_RandomStreams(2012+9+18)
 
     if x > 0:
-        sampling_updates = model.get_sampling_updates(
+        t1 = time.time()
+        sample_func = model.get_sampling_function(
             layer_to_state,
             theano_rng,
             layer_to_clamp={model.visible_layer: True},
             num_steps=x)
-
-        t1 = time.time()
-        sample_func = function([], updates=sampling_updates)
         t2 = time.time()
         print('Clamped sampling function compilation took', t2-t1)
         sample_func()
 
     # Now compile the full sampling update
-    sampling_updates = model.get_sampling_updates(layer_to_state,
-                                                  theano_rng)
-    assert layer_to_state[model.visible_layer] in sampling_updates
-
     t1 = time.time()
-    sample_func = function([], updates=sampling_updates)
+    sample_func = model.get_sampling_function(layer_to_state, theano_rng)
     t2 = time.time()
     print('Sampling function compilation took', t2-t1)
 